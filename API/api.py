@@ -5,27 +5,58 @@ Flask ingest API for Zeus telemetry.
 - POST /ingest
   Accepts a single telemetry sample or an array of samples.
   If header 'x-client-id' is missing: create a new client_id and return it.
+  If header 'x-idempotency-key' is present (any non-empty value; it acts as a flag),
+  samples that carry their own timestamp are upserted on (client_id, host, gpu_id,
+  timestamp) so a retried batch does not duplicate data. Samples without a timestamp
+  are always inserted. Needs a MongoDB version that supports upserts on time-series
+  collections.
   Stores documents in a MongoDB time-series collection 'gpu_metrics' with metadata.client_id.
 
-- GET /metrics/recent?client_id=...&limit=200
-- GET /predictions/recent?client_id=...&limit=100
+- GET /metrics/recent?client_id=...&limit=200&since=...
+- GET /predictions/recent?client_id=...&limit=100&since=...
+  'since' is an ISO-8601 lower bound on timestamp (default: the last 24 hours, so
+  clients with no newer data get an empty list; pass an older 'since' to reach it).
+  Send 'Accept: application/x-ndjson' to stream one document per line instead.
 - GET /health
 
 Environment variables:
 - MONGO_URI (required): MongoDB Atlas connection string
 - MONGO_DB  (optional): database name (default 'zeus_multi')
 - TTL_SECONDS (optional): integer seconds to keep telemetry (0 = disabled)
+- RUN_MIGRATIONS (optional): set to 1 to create collections/indexes at startup;
+  otherwise run `flask --app api zeus init-indexes` once per deploy
+- MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE (optional): connection pool bounds per process (default 50 / 5)
+- INGEST_UNACK (optional): set to 1 to write telemetry unordered with w=0 (fire-and-forget)
 """
 import os
+import re
 import secrets
+import socket
 import logging
-from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional, Union
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Tuple, Union
 
+import click
+import orjson
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, abort
+from flask import Flask, request, abort
+from flask.cli import AppGroup
 from flask_cors import CORS
-from pymongo import MongoClient, ASCENDING, DESCENDING, errors
+from pymongo import (
+    MongoClient, ASCENDING, DESCENDING, InsertOne, UpdateOne, WriteConcern, errors
+)
+
+# Optional timestamp parsers: ciso8601 is the fast path, dateutil the lenient fallback
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+try:
+    from dateutil import parser as dateparser
+except ImportError:
+    dateparser = None
 
 # Load environment variables from .env file
 load_dotenv()
@@ -42,89 +73,312 @@ if not MONGO_URI:
 
 MONGO_DB = os.getenv("MONGO_DB", "zeus_multi")
 TTL_SECONDS = int(os.getenv("TTL_SECONDS", "0"))
+RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS", "0") == "1"
+# A schema lock older than this is assumed to belong to a crashed process
+SCHEMA_LOCK_STALE_AFTER = timedelta(minutes=10)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+INGEST_UNACK = os.getenv("INGEST_UNACK", "0") == "1"
+INGEST_CHUNK_SIZE = 100
+KNOWN_CLIENTS_MAX = 100_000
+RECENT_WINDOW = timedelta(hours=24)
+MAX_LIMIT = 2000
+_LIMIT_RE = re.compile(r"[+-]?[0-9]+")
+NDJSON_MIMETYPE = "application/x-ndjson"
+NDJSON_BATCH_SIZE = 500
 
 # --- Flask app ---
 app = Flask(__name__)
 CORS(app)
 
+# Responses are encoded with orjson (see json_response), not Flask's stdlib encoder
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC
+
 # --- Mongo client & collections ---
-# Configure MongoDB client with minimal explicit settings
-# Let the connection URI handle most SSL/TLS configuration
-mongo = MongoClient(
-    MONGO_URI,
-    serverSelectionTimeoutMS=30000,
-    connectTimeoutMS=30000,
-    socketTimeoutMS=30000,
-    tlsAllowInvalidCertificates=True,
-    retryWrites=True
-)
-db = mongo[MONGO_DB]
-clients_col = db["clients"]
-metrics_col = db["gpu_metrics"]
-predictions_col = db["predictions"]
-ws_pub_col = db["ws_pub"]
+def connect_mongo() -> None:
+    """
+    Create the MongoClient and collection handles. Gunicorn preloads the app in
+    the master, so every worker calls this again after fork (see gunicorn.conf.py)
+    rather than sharing the master's sockets.
+    """
+    global mongo, db, clients_col, metrics_col, predictions_col, ws_pub_col, metrics_fast
+    # Configure MongoDB client with minimal explicit settings
+    # Let the connection URI handle most SSL/TLS configuration
+    mongo = MongoClient(
+        MONGO_URI,
+        appname="zeus-api",
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        # Fail fast if every pooled connection is busy rather than queueing requests
+        waitQueueTimeoutMS=2000,
+        # zstd if the server supports it and the pymongo[zstd] extra is installed, zlib
+        # (stdlib) otherwise; pymongo skips unavailable compressors, so the fallback is intended
+        compressors="zstd,zlib",
+        serverSelectionTimeoutMS=30000,
+        connectTimeoutMS=30000,
+        socketTimeoutMS=30000,
+        tlsAllowInvalidCertificates=True,
+        retryWrites=True
+    )
+    db = mongo[MONGO_DB]
+    clients_col = db["clients"]
+    metrics_col = db["gpu_metrics"]
+    predictions_col = db["predictions"]
+    ws_pub_col = db["ws_pub"]
+    # Unacknowledged handle for telemetry writes when INGEST_UNACK=1
+    metrics_fast = metrics_col.with_options(write_concern=WriteConcern(w=0))
+
+connect_mongo()
 
 # --- Ensure collections / indexes ---
 def ensure_collections_and_indexes():
+    """
+    Create the time-series collection and indexes. Errors propagate to the
+    caller; only a TTL index the tier doesn't support is tolerated.
+    """
+    if "gpu_metrics" not in db.list_collection_names():
+        logger.info("Creating time-series collection 'gpu_metrics'")
+        db.create_collection(
+            "gpu_metrics",
+            timeseries={"timeField": "timestamp", "metaField": "metadata", "granularity": "seconds"},
+        )
+    metrics_col.create_index([("metadata.client_id", ASCENDING), ("timestamp", DESCENDING)])
+    predictions_col.create_index([("client_id", ASCENDING), ("timestamp", DESCENDING)])
+    ws_pub_col.create_index([("client_id", ASCENDING), ("timestamp", DESCENDING)])
+    clients_col.create_index([("client_id", ASCENDING)], unique=True)
+    if TTL_SECONDS > 0:
+        try:
+            metrics_col.create_index("timestamp", expireAfterSeconds=TTL_SECONDS)
+            logger.info(f"Created TTL index expireAfterSeconds={TTL_SECONDS}")
+        except errors.OperationFailure as e:
+            logger.warning("Could not create TTL index (maybe not supported on this tier): %s", e)
+
+def run_migrations(force: bool = False) -> bool:
+    """
+    Run ensure_collections_and_indexes() under a lock document in 'clients', so
+    concurrent processes (workers, instances, the CLI) don't all issue the same
+    DDL. A lock older than SCHEMA_LOCK_STALE_AFTER is taken over; force=True
+    ignores the lock entirely. Returns True if this process ran it; setup
+    errors are raised after the lock is released.
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    now = datetime.now(timezone.utc)
+    lock_filter = {"_id": "schema_lock"}
+    if not force:
+        lock_filter["acquired_at"] = {"$lt": now - SCHEMA_LOCK_STALE_AFTER}
     try:
-        if "gpu_metrics" not in db.list_collection_names():
-            logger.info("Creating time-series collection 'gpu_metrics'")
-            db.create_collection(
-                "gpu_metrics",
-                timeseries={"timeField": "timestamp", "metaField": "metadata", "granularity": "seconds"},
-            )
-        metrics_col.create_index([("metadata.client_id", ASCENDING), ("timestamp", DESCENDING)])
-        predictions_col.create_index([("client_id", ASCENDING), ("timestamp", DESCENDING)])
-        ws_pub_col.create_index([("client_id", ASCENDING), ("timestamp", DESCENDING)])
-        clients_col.create_index([("client_id", ASCENDING)], unique=True)
-        if TTL_SECONDS > 0:
-            try:
-                metrics_col.create_index("timestamp", expireAfterSeconds=TTL_SECONDS)
-                logger.info(f"Created TTL index expireAfterSeconds={TTL_SECONDS}")
-            except errors.OperationFailure as e:
-                logger.warning("Could not create TTL index (maybe not supported on this tier): %s", e)
+        # Matches a missing (upsert) or stale lock; a live lock makes the upsert
+        # collide on _id instead
+        clients_col.find_one_and_update(
+            lock_filter,
+            {"$set": {"owner": owner, "acquired_at": now}},
+            upsert=True,
+        )
+    except errors.DuplicateKeyError:
+        held = clients_col.find_one({"_id": "schema_lock"}) or {}
+        logger.info(
+            "Schema lock held by %s since %s - skipping collection/index setup",
+            held.get("owner"), held.get("acquired_at"),
+        )
+        return False
+    except errors.PyMongoError as e:
+        logger.exception("Could not acquire schema lock: %s", e)
+        return False
+    try:
+        ensure_collections_and_indexes()
+    finally:
+        clients_col.delete_one({"_id": "schema_lock", "owner": owner})
+    return True
+
+if RUN_MIGRATIONS:
+    try:
+        run_migrations()
     except Exception as e:
         logger.exception("Error ensuring collections/indexes: %s", e)
 
-ensure_collections_and_indexes()
+zeus_cli = AppGroup("zeus", help="Zeus API maintenance commands.")
+
+@zeus_cli.command("init-indexes")
+@click.option("--force", is_flag=True, help="Ignore an existing schema lock.")
+def init_indexes_command(force: bool):
+    """Create the time-series collection and indexes."""
+    try:
+        ran = run_migrations(force=force)
+    except Exception as e:
+        logger.exception("Error ensuring collections/indexes: %s", e)
+        raise click.ClickException(f"Collection/index setup failed: {e}")
+    if not ran:
+        raise click.ClickException(
+            "Collection/index setup did not run (see log); use --force if the schema lock is stuck"
+        )
+    click.echo("Collections and indexes are up to date")
+
+app.cli.add_command(zeus_cli)
 
 # --- Helpers ---
 def generate_client_id() -> str:
     return "c_" + secrets.token_urlsafe(16)
 
-def parse_timestamp(value) -> datetime:
+def _to_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def try_parse_timestamp(value) -> Optional[datetime]:
     """
-    Accept datetime-like string or object. Return tz-aware datetime in UTC.
+    Accept datetime-like string or object. Return tz-aware datetime in UTC,
+    or None if the value is missing or unparseable.
     """
-    if value is None:
-        return datetime.now(timezone.utc)
-    # If already a datetime (rare because Flask parses JSON into dicts)
-    try:
-        from dateutil import parser as dateparser  # optional: only used if string parsing needed
-    except Exception:
-        dateparser = None
-    if isinstance(value, datetime):
-        if value.tzinfo is None:
-            return value.replace(tzinfo=timezone.utc)
-        return value.astimezone(timezone.utc)
     if isinstance(value, str):
+        # ISO-8601 is what clients send; only fall back to dateutil for anything else
+        if ciso8601:
+            try:
+                return _to_utc(ciso8601.parse_datetime(value))
+            except (ValueError, OverflowError):
+                pass
+        try:
+            return _to_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except (ValueError, OverflowError):
+            pass
         if dateparser:
             try:
-                dt = dateparser.parse(value)
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=timezone.utc)
-                return dt.astimezone(timezone.utc)
-            except Exception:
+                return _to_utc(dateparser.parse(value))
+            except (ValueError, OverflowError):
                 pass
-        # fallback naive parse: try fromisoformat
+    # If already a datetime (rare because Flask parses JSON into dicts)
+    elif isinstance(value, datetime):
+        return _to_utc(value)
+    return None
+
+def parse_timestamp(value, default: Optional[datetime] = None) -> datetime:
+    """
+    Like try_parse_timestamp, but missing or unparseable values resolve to
+    `default` (or now, if not given).
+    """
+    return try_parse_timestamp(value) or default or datetime.now(timezone.utc)
+
+# Top-level keys of a flat sample that are not metrics
+_SAMPLE_META_KEYS = frozenset(("timestamp", "host", "gpu_id", "gpu_name", "metadata", "metrics"))
+
+def _safe_int(value) -> int:
+    if value is None:
+        return 0
+    if type(value) is int:
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+def sample_to_doc(s: Dict[str, Any], client_id: str, now: datetime) -> Tuple[Dict[str, Any], bool]:
+    """
+    Build a gpu_metrics document from one telemetry sample.
+    Supports both nested ({"metadata": ..., "metrics": ...}) and flat samples;
+    in a flat sample every non-metadata field is a metric.
+    Returns (doc, has_timestamp); has_timestamp is False when the sample had no
+    usable timestamp of its own and `now` was used instead.
+    """
+    ts = try_parse_timestamp(s.get("timestamp"))
+    if "metadata" in s and "metrics" in s:
+        md = s["metadata"] or {}
+        metrics = s["metrics"]
+    else:
+        md = s
+        metrics = {k: v for k, v in s.items() if k not in _SAMPLE_META_KEYS}
+    return {
+        "timestamp": ts or now,
+        "metadata": {
+            "client_id": client_id,
+            "host": md.get("host", "unknown"),
+            "gpu_id": _safe_int(md.get("gpu_id")),
+            "gpu_name": md.get("gpu_name"),
+        },
+        "metrics": metrics,
+    }, ts is not None
+
+def parse_limit(value: Optional[str], default: int) -> int:
+    """
+    Validate ?limit= with a precompiled pattern instead of int() + try/except.
+    Missing or non-integer values fall back to default; integers are clamped to 1..MAX_LIMIT.
+    """
+    if value is None or not _LIMIT_RE.fullmatch(value):
+        return default
+    if len(value.lstrip("+-").lstrip("0")) > 9:
+        # Far out of range either way; skip int() on arbitrarily long digit strings
+        return 1 if value[0] == "-" else MAX_LIMIT
+    return max(1, min(int(value), MAX_LIMIT))
+
+def parse_since(value: Optional[str]) -> datetime:
+    """
+    Lower time bound for the /recent endpoints. Bounding the range lets the
+    (client_id, timestamp) index seek straight to the window instead of
+    walking the client's whole history.
+    """
+    if value:
         try:
-            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
-            if dt.tzinfo is None:
-                dt = dt.replace(tzinfo=timezone.utc)
-            return dt.astimezone(timezone.utc)
-        except Exception:
-            return datetime.now(timezone.utc)
-    return datetime.now(timezone.utc)
+            return _to_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except (ValueError, OverflowError):
+            abort(400, description="Invalid since (expected ISO-8601)")
+    return datetime.now(timezone.utc) - RECENT_WINDOW
+
+def json_response(obj, status: int = 200):
+    """
+    Serialize obj with orjson. Datetimes are encoded natively (naive values are
+    treated as UTC, which is what pymongo returns); anything else orjson does not
+    know about, e.g. ObjectId, falls back to str().
+    """
+    return app.response_class(
+        orjson.dumps(obj, default=str, option=ORJSON_OPTIONS),
+        status=status,
+        mimetype="application/json",
+    )
+
+# Process-local LRU of client_ids known to exist. Clients are never deleted,
+# so a hit can skip the clients lookup entirely.
+_known_clients: "OrderedDict[str, None]" = OrderedDict()
+_known_clients_lock = threading.Lock()
+
+def remember_client(client_id: str) -> None:
+    with _known_clients_lock:
+        _known_clients[client_id] = None
+        _known_clients.move_to_end(client_id)
+        if len(_known_clients) > KNOWN_CLIENTS_MAX:
+            _known_clients.popitem(last=False)
+
+def client_exists(client_id: str) -> bool:
+    with _known_clients_lock:
+        if client_id in _known_clients:
+            _known_clients.move_to_end(client_id)
+            return True
+    if clients_col.find_one({"client_id": client_id}, projection={"_id": 1}):
+        remember_client(client_id)
+        return True
+    return False
+
+def wants_ndjson() -> bool:
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def ndjson_response(cursor):
+    """
+    Stream cursor results as newline-delimited JSON, one batch in memory at a time.
+    The first document is fetched before returning, so query errors still become
+    a 500 rather than a truncated 200.
+    """
+    cursor.batch_size(NDJSON_BATCH_SIZE)
+    first = next(cursor, None)
+
+    def generate():
+        if first is None:
+            return
+        try:
+            yield orjson.dumps(first, default=str, option=ORJSON_OPTIONS) + b"\n"
+            for d in cursor:
+                yield orjson.dumps(d, default=str, option=ORJSON_OPTIONS) + b"\n"
+        except Exception as e:
+            logger.exception("NDJSON stream aborted mid-response: %s", e)
+            raise
+
+    return app.response_class(generate(), mimetype=NDJSON_MIMETYPE)
 
 def resolve_or_create_client(x_client_id: Optional[str]) -> str:
     """
@@ -135,19 +389,20 @@ def resolve_or_create_client(x_client_id: Optional[str]) -> str:
       - create new client doc and return the id
     """
     if x_client_id:
-        if clients_col.find_one({"client_id": x_client_id}):
+        if client_exists(x_client_id):
             return x_client_id
         abort(401, description="Invalid client_id")
     # create
     new_id = generate_client_id()
     clients_col.insert_one({"client_id": new_id, "created_at": datetime.now(timezone.utc)})
+    remember_client(new_id)
     logger.info("Created new client_id %s", new_id)
     return new_id
 
 # --- Routes ---
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"ok": True, "time": datetime.now(timezone.utc).isoformat()})
+    return json_response({"ok": True, "time": datetime.now(timezone.utc)})
 
 @app.route("/ingest", methods=["POST"])
 def ingest():
@@ -165,105 +420,89 @@ def ingest():
     else:
         abort(400, description="Payload must be object or array of objects")
 
-    docs = []
-    for s in samples:
-        if not isinstance(s, dict):
-            continue
-            
-        ts = parse_timestamp(s.get("timestamp"))
-        
-        # Support both nested and flat structures
-        # If 'metadata' and 'metrics' exist, use nested structure
-        # Otherwise, extract from flat structure
-        if "metadata" in s and "metrics" in s:
-            # Nested structure
-            md = s.get("metadata", {})
-            metrics = s.get("metrics", {})
-            try:
-                gpu_id = int(md.get("gpu_id", 0)) if md.get("gpu_id", None) is not None else 0
-            except Exception:
-                gpu_id = 0
-            host = md.get("host", "unknown")
-            gpu_name = md.get("gpu_name")
-        else:
-            # Flat structure - extract metadata and metrics
-            try:
-                gpu_id = int(s.get("gpu_id", 0)) if s.get("gpu_id", None) is not None else 0
-            except Exception:
-                gpu_id = 0
-            host = s.get("host", "unknown")
-            gpu_name = s.get("gpu_name")
-            
-            # All non-metadata fields go into metrics
-            metrics = {
-                k: v for k, v in s.items() 
-                if k not in ["timestamp", "host", "gpu_id", "gpu_name", "metadata", "metrics"]
-            }
-        
-        doc = {
-            "timestamp": ts,
-            "metadata": {
-                "client_id": client_id,
-                "host": host,
-                "gpu_id": gpu_id,
-                "gpu_name": gpu_name,
-            },
-            "metrics": metrics,
-        }
-        docs.append(doc)
+    # One wall-clock read per request for samples without a usable timestamp
+    now = datetime.now(timezone.utc)
+    docs = [sample_to_doc(s, client_id, now) for s in samples if isinstance(s, dict)]
 
     if docs:
+        if request.headers.get("x-idempotency-key"):
+            # Retries hit the same (client, host, gpu, timestamp) and become no-ops.
+            # Samples that fell back to `now` have no stable key, so they are inserted.
+            ops = [
+                UpdateOne(
+                    {
+                        "metadata.client_id": client_id,
+                        "metadata.host": d["metadata"]["host"],
+                        "metadata.gpu_id": d["metadata"]["gpu_id"],
+                        "timestamp": d["timestamp"],
+                    },
+                    {"$setOnInsert": {"metadata": d["metadata"], "metrics": d["metrics"]}},
+                    upsert=True,
+                ) if has_timestamp else InsertOne(d)
+                for d, has_timestamp in docs
+            ]
+        else:
+            ops = [InsertOne(d) for d, _ in docs]
         try:
-            # insert_many expects dicts with proper datetime objects
-            result = metrics_col.insert_many(docs)
-            inserted = len(result.inserted_ids)
+            if INGEST_UNACK:
+                # Fire-and-forget: no ack round trip, nothing to count but what was sent
+                for i in range(0, len(ops), INGEST_CHUNK_SIZE):
+                    metrics_fast.bulk_write(ops[i:i + INGEST_CHUNK_SIZE], ordered=False)
+                inserted = len(ops)
+            else:
+                result = metrics_col.bulk_write(ops, ordered=False)
+                inserted = result.inserted_count + result.upserted_count
         except Exception as e:
             logger.exception("DB insert error: %s", e)
             abort(500, description="Database insert error")
     else:
         inserted = 0
 
-    return jsonify({"ok": True, "client_id": client_id, "inserted": inserted})
+    return json_response({"ok": True, "client_id": client_id, "inserted": inserted})
 
 @app.route("/metrics/recent", methods=["GET"])
 def metrics_recent():
     client_id = request.args.get("client_id")
     if not client_id:
         abort(400, description="Missing client_id")
-    if not clients_col.find_one({"client_id": client_id}):
+    if not client_exists(client_id):
         abort(404, description="Unknown client_id")
-    try:
-        limit = int(request.args.get("limit", "200"))
-        limit = max(1, min(limit, 2000))
-    except ValueError:
-        limit = 200
-    cursor = metrics_col.find({"metadata.client_id": client_id}).sort("timestamp", DESCENDING).limit(limit)
-    out = []
-    for d in cursor:
-        d["_id"] = str(d["_id"])
-        d["timestamp"] = d.get("timestamp").isoformat() if d.get("timestamp") else None
-        out.append(d)
-    return jsonify({"metrics": out})
+    limit = parse_limit(request.args.get("limit"), 200)
+    since = parse_since(request.args.get("since"))
+    cursor = (
+        metrics_col.find(
+            {"metadata.client_id": client_id, "timestamp": {"$gte": since}},
+            projection={"_id": 0},
+        )
+        .sort("timestamp", DESCENDING)
+        .limit(limit)
+        .batch_size(limit)
+    )
+    if wants_ndjson():
+        return ndjson_response(cursor)
+    return json_response({"metrics": list(cursor)})
 
 @app.route("/predictions/recent", methods=["GET"])
 def predictions_recent():
     client_id = request.args.get("client_id")
     if not client_id:
         abort(400, description="Missing client_id")
-    if not clients_col.find_one({"client_id": client_id}):
+    if not client_exists(client_id):
         abort(404, description="Unknown client_id")
-    try:
-        limit = int(request.args.get("limit", "100"))
-        limit = max(1, min(limit, 2000))
-    except ValueError:
-        limit = 100
-    cursor = predictions_col.find({"client_id": client_id}).sort("timestamp", DESCENDING).limit(limit)
-    out = []
-    for d in cursor:
-        d["_id"] = str(d["_id"])
-        d["timestamp"] = d.get("timestamp").isoformat() if d.get("timestamp") else None
-        out.append(d)
-    return jsonify({"predictions": out})
+    limit = parse_limit(request.args.get("limit"), 100)
+    since = parse_since(request.args.get("since"))
+    cursor = (
+        predictions_col.find(
+            {"client_id": client_id, "timestamp": {"$gte": since}},
+            projection={"_id": 0},
+        )
+        .sort("timestamp", DESCENDING)
+        .limit(limit)
+        .batch_size(limit)
+    )
+    if wants_ndjson():
+        return ndjson_response(cursor)
+    return json_response({"predictions": list(cursor)})
 
 # --- Main entrypoint for development ---
 if __name__ == "__main__":
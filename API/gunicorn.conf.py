@@ -8,10 +8,14 @@ backlog = 2048
 
 # Worker processes
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = 'sync'
+# Threaded workers: requests waiting on MongoDB don't block the whole worker,
+# and all threads share the worker's pooled MongoClient
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
 worker_connections = 1000
 timeout = 30
-keepalive = 2
+# Outlive the load balancer's idle timeout so client connections get reused
+keepalive = 75
 
 # Logging
 accesslog = '-'
@@ -23,6 +27,8 @@ access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
 proc_name = 'zeus-api'
 
 # Server mechanics
+# Import the app once in the master; workers fork from it
+preload_app = True
 daemon = False
 pidfile = None
 umask = 0
@@ -30,6 +36,18 @@ user = None
 group = None
 tmp_upload_dir = None
 
+# Server hooks
+def when_ready(server):
+    # Preload (and migrations) are done: drop the master's MongoClient so it
+    # doesn't hold pooled connections and monitor threads, or leak into forks
+    import api
+    api.mongo.close()
+
+def post_fork(server, worker):
+    # MongoClient is not fork-safe: give each worker its own client and pool
+    import api
+    api.connect_mongo()
+
 # SSL (not needed on Render, they handle it)
 # keyfile = None
 # certfile = None